@@ -21,7 +21,18 @@ async def startup_event():
     """Initialize the search function on startup"""
     global hybrid_search_func
     try:
-        from hybrid_search import hybrid_search
+        import torch
+        # Split cores between uvicorn workers; torch's default oversubscribes them
+        workers = max(1, int(os.getenv("UVICORN_WORKERS", "1")))
+        torch.set_num_threads(int(os.getenv("TORCH_THREADS", max(1, (os.cpu_count() or 1) // workers))))
+        torch.set_num_interop_threads(1)
+
+        from hybrid_search import hybrid_search, get_index, get_model, get_columns, get_tf_index
+        # Warm the caches so the first query doesn't pay for loading them
+        get_index()
+        get_model()
+        get_columns()
+        get_tf_index()
         hybrid_search_func = hybrid_search
         print("✅ Hybrid search initialized successfully")
     except Exception as e:
@@ -53,6 +64,10 @@ def search(q: str = Query(..., description="Search query"),
     """
     Run hybrid search on the news corpus.
     """
+    q = q.strip()
+    if not q:
+        return {"query": q, "count": 0, "results": []}
+
     if hybrid_search_func is None:
         raise HTTPException(
             status_code=503, 
@@ -2,14 +2,19 @@ import json, os
 from pathlib import Path
 from datetime import datetime, timezone
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import torch
 from sentence_transformers import SentenceTransformer
 from local_search import latest_jsonl_files,load_jsonl,textify,as_utc
+from keyword_index import build_tf_index, save_tf_index
 
 DATA_DIR = Path("data/raw")
 OUT_DIR = Path("data/index")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 MODEL_NAME = os.getenv("EMBEDDING_MODEL")
+BATCH_SIZE = 256
 
 
 def main():
@@ -17,26 +22,45 @@ def main():
     items = load_jsonl(src)
     print(f"Loaded {len(items)} items from {src.name}")
 
-    model = SentenceTransformer(MODEL_NAME)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(MODEL_NAME, device=device)
+    if device == "cuda":
+        model.half()  # FP16 roughly doubles GPU encode throughput
+    # keep input order: encode() length-sorts internally to minimize padding
     texts = [textify(it) for it in items]
 
     embs = model.encode(
-        texts, batch_size=32, normalize_embeddings=True, show_progress_bar=True
+        texts, batch_size=BATCH_SIZE, normalize_embeddings=True,
+        show_progress_bar=True, convert_to_numpy=True
     )
-    embs = np.asarray(embs, dtype=np.float32)
+    embs = np.asarray(embs, dtype=np.float32)  # no-op on CPU; upcasts FP16 output
     np.save(OUT_DIR / "embeddings.npy", embs)
 
+    columns = []
     with (OUT_DIR / "meta.jsonl").open("w", encoding="utf-8") as f:
         for item in items:
             published_at = item.get("published_at")
-            published_str = as_utc(published_at).isoformat() if published_at else None
-            
-            f.write(json.dumps({
+            published_dt = as_utc(published_at)
+            published_str = published_dt.isoformat() if published_at else None
+
+            row = {
                 "title": item.get("title"),
                 "url": item.get("url"),
                 "published_at": published_str,
                 "source": item.get("source")
-            }, ensure_ascii=False) + "\n")
+            }
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            # search-time columns: summary and a precomputed timestamp for recency
+            columns.append({
+                **row,
+                "summary": item.get("summary"),
+                "published_at_unix": published_dt.timestamp(),
+            })
+
+    pq.write_table(pa.Table.from_pylist(columns), OUT_DIR / "meta.parquet")
+
+    tf = build_tf_index([it.get("title") for it in items], [it.get("summary") for it in items])
+    save_tf_index(tf, OUT_DIR)
 
     (OUT_DIR / "model.txt").write_text(MODEL_NAME, encoding="utf-8")
     (OUT_DIR / "source_file.txt").write_text(src.name, encoding="utf-8")
@@ -44,6 +68,8 @@ def main():
     print("Saved:")
     print(" - data/index/embeddings.npy")
     print(" - data/index/meta.jsonl")
+    print(" - data/index/meta.parquet")
+    print(" - data/index/tf_title.npz, tf_summary.npz, vocab.json")
     print(" - data/index/model.txt")
     print(" - data/index/source_file.txt")
     
@@ -5,16 +5,30 @@ import faiss
 EMB_PATH = Path("data/index/embeddings.npy")
 IDX_PATH = Path("data/index/faiss.index")
 
+# Below this size an exact scan is cheap and avoids HNSW recall loss
+HNSW_MIN_VECTORS = 10_000
+# HNSW graph parameters (neighbors per node / build-time beam width)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+# Rows added per index.add call while streaming embeddings from disk
+ADD_BLOCK = 8192
+
 def build_faiss_index():
-    # Load embeddings
-    embeddings = np.load(EMB_PATH)
+    # Memory-map embeddings; pages are faulted in as each block is added
+    embeddings = np.load(EMB_PATH, mmap_mode="r")
     n,d = embeddings.shape
 
     print(f"Loaded embeddings from {EMB_PATH} of shape: {n} x {d}")
 
-    # Build FAISS index
-    index = faiss.IndexFlatL2(d)
-    index.add(embeddings)
+    # Build FAISS index. Embeddings are L2-normalized, so inner product == cosine.
+    # For much larger corpora consider faiss.index_factory(d, "OPQ32,IVF4096_HNSW32,PQ32").
+    if n < HNSW_MIN_VECTORS:
+        index = faiss.IndexFlatIP(d)
+    else:
+        index = faiss.IndexHNSWFlat(d, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    for i in range(0, n, ADD_BLOCK):
+        index.add(np.ascontiguousarray(embeddings[i:i + ADD_BLOCK], dtype=np.float32))
     faiss.write_index(index, str(IDX_PATH))
 
     print(f"Saved FAISS index to {IDX_PATH} with {index.ntotal} vectors.")
@@ -1,14 +1,20 @@
-import os, json
+import os
+import orjson
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent))
+from functools import lru_cache
 from datetime import datetime, timezone
 import numpy as np
 import faiss
+import torch
+import pyarrow.parquet as pq
 from sentence_transformers import SentenceTransformer
-from text_utils import enhanced_keyword_score, must_have_gate 
+from text_utils import tokenize, phrase_bonus, score_item, MUST_TERMS
+from keyword_index import load_tf_index, tf_keyword_scores
+from onnx_encoder import OnnxEncoder
 from semantic_search import load_meta
-from local_search import recency_boost
+from local_search import recency_boost_unix, as_utc
 from score_plot import save_debug_plots, plot_breakdown
 from dotenv import load_dotenv
 
@@ -18,32 +24,97 @@ load_dotenv()
 
 IDX_PATH    = Path("data/index/faiss.index")
 META_PATH   = Path("data/index/meta.jsonl")
+META_PARQUET = Path("data/index/meta.parquet")
 SOURCE_FILE = Path("data/index/source_file.txt")
 RAW_DIR     = Path("data/raw")
 MODEL_NAME  = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+ONNX_DIR    = os.getenv("EMBEDDING_ONNX_DIR")  # optional ONNX Runtime export of MODEL_NAME
+ONNX_POOLING = os.getenv("EMBEDDING_POOLING", "cls")
+HNSW_EF_SEARCH = 64  # query-time beam width for HNSW indexes
 
 # Blending weights
 SEM_W, KW_W, REC_W = 0.45, 0.35, 0.20  # semantic / keyword / recency
 
+# Process-wide cache for the index, model and corpus (loaded once, reused per query)
+_STATE = {}
+
 
 def load_raw_items() -> list[dict]:
     """Load the original raw JSONL (with summaries), aligned with embeddings order."""
     src_name = SOURCE_FILE.read_text(encoding="utf-8").strip()
     src_path = RAW_DIR / src_name
-    items: list[dict] = []
-    with src_path.open(encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                items.append(json.loads(line))
-    return items
+    # orjson parses the raw bytes directly, skipping the utf-8 decode
+    with src_path.open("rb") as f:
+        return [orjson.loads(line) for line in f if line.strip()]
+
+def load_columns() -> dict[str, list]:
+    """Load the corpus columns needed for ranking, aligned with embeddings order."""
+    if META_PARQUET.exists():
+        cols = pq.read_table(META_PARQUET).to_pydict()
+        cols["published_at_unix"] = np.asarray(cols["published_at_unix"], dtype=np.float64)
+        return cols
+
+    # Indexes built before meta.parquet existed: assemble the same columns from JSONL
+    meta      = load_meta()
+    raw_items = load_raw_items()
+    pub_ats   = [m.get("published_at") or m.get("published") for m in meta]
+    return {
+        "title":        [m.get("title") for m in meta],
+        "url":          [m.get("url") for m in meta],
+        "published_at": pub_ats,
+        "source":       [m.get("source") for m in meta],
+        "summary":      [raw_items[i].get("summary") if i < len(raw_items) else None
+                         for i in range(len(meta))],
+        "published_at_unix": np.fromiter((as_utc(p).timestamp() for p in pub_ats),
+                                         dtype=np.float64, count=len(pub_ats)),
+    }
+
+def get_index():
+    """FAISS index, read from disk on first use."""
+    if "index" not in _STATE:
+        index = faiss.read_index(str(IDX_PATH))
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        _STATE["index"] = index
+    return _STATE["index"]
+
+def get_model() -> SentenceTransformer | OnnxEncoder:
+    """Embedding model (ONNX Runtime if EMBEDDING_ONNX_DIR is set), instantiated on first use."""
+    if "model" not in _STATE:
+        if ONNX_DIR:
+            _STATE["model"] = OnnxEncoder(ONNX_DIR, MODEL_NAME, pooling=ONNX_POOLING)
+        else:
+            _STATE["model"] = SentenceTransformer(MODEL_NAME).eval()
+    return _STATE["model"]
+
+def get_columns() -> dict[str, list]:
+    """Corpus columns (see load_columns), loaded on first use."""
+    if "columns" not in _STATE:
+        _STATE["columns"] = load_columns()
+    return _STATE["columns"]
+
+def get_tf_index() -> dict | None:
+    """Keyword term-frequency matrices, or None for indexes built without them."""
+    if "tf" not in _STATE:
+        _STATE["tf"] = load_tf_index()
+    return _STATE["tf"]
+
+@lru_cache(maxsize=4096)
+def _encode_query(q: str) -> np.ndarray:
+    """Embed a normalized query; repeated queries skip the transformer forward pass.
+    The returned array is shared between callers and must not be modified."""
+    with torch.inference_mode():
+        return get_model().encode([q], normalize_embeddings=True).astype(np.float32)
 
 def semantic_candidates(query: str, k: int = 20):
-    """Return (scores, indices) from FAISS for the top-k semantic neighbors."""
-    index = faiss.read_index(str(IDX_PATH))
-    model = SentenceTransformer(MODEL_NAME)
-    q = model.encode([query], normalize_embeddings=True).astype(np.float32)
+    """Return (cosine scores, indices) from FAISS for the top-k semantic neighbors."""
+    index = get_index()
+    # bge tokenizers are uncased, so lowercasing only widens cache hits
+    q = _encode_query(query.strip().lower())
     D, I = index.search(q, k)
+    if index.metric_type == faiss.METRIC_L2:
+        # older L2 indexes: squared distance between unit vectors is 2 - 2*cos
+        return 1.0 - D[0] / 2.0, I[0]
     return D[0], I[0]
 
 
@@ -51,77 +122,72 @@ def hybrid_search(query: str, k: int = 8):
     """
     Hybrid = normalized semantic + normalized keyword + recency, with a soft must-have gate.
     """
-    meta      = load_meta()
-    raw_items = load_raw_items()
-    now       = datetime.now(timezone.utc)
-
-    cand_k = min(50, len(meta))
-    sem_scores, sem_idxs = semantic_candidates(query, k=cand_k)
-
-    candidates = []
-    for s, idx in zip(sem_scores, sem_idxs):
-        if idx == -1 or idx >= len(meta):
-            continue
-        m   = meta[idx]
-        raw = raw_items[idx] if idx < len(raw_items) else {}
-
-        title   = m.get("title") or ""
-        summary = raw.get("summary") or ""
-        pub_at  = m.get("published_at") or m.get("published")
-
-        kw_raw = enhanced_keyword_score(query, title, summary)
-        rec    = recency_boost(pub_at, now) 
-
-        candidates.append({
-            "idx": int(idx),
-            "title": title,
-            "summary": summary,
-            "url": m.get("url"),
-            "published_at": pub_at,
-            "source": m.get("source"),
-            "semantic_raw": float(s),
-            "keyword_raw":  float(kw_raw),
-            "recency":      float(rec),
-        })
-
-    if not candidates:
+    if not query.strip():
         return []
 
-    # normalize semantic (min-max) to [0,1]
-    sem_vals = [c["semantic_raw"] for c in candidates]
-    smin, smax = float(min(sem_vals)), float(max(sem_vals))
-    sden = max(1e-9, smax - smin)
-    for c in candidates:
-        c["semantic_norm"] = (c["semantic_raw"] - smin) / sden
+    cols   = get_columns()
+    n_docs = len(cols["title"])
+    now    = datetime.now(timezone.utc)
 
-    # normalize keyword by max to [0,1]
-    kw_vals = [c["keyword_raw"] for c in candidates]
-    kmax = max(1e-9, float(max(kw_vals)))
-    for c in candidates:
-        c["keyword_norm"] = c["keyword_raw"] / kmax
+    cand_k = min(50, n_docs)
+    sem_scores, sem_idxs = semantic_candidates(query, k=cand_k)
 
-    # final score + soft must-have
-    for c in candidates:
-        score = SEM_W * c["semantic_norm"] + KW_W * c["keyword_norm"] + REC_W * c["recency"]
-        if not must_have_gate(query, c["title"], c["summary"]):
-            score *= 0.6  # soft penalty if query expects cargo/station but doc lacks it
-        c["score_final"] = score
+    # drop FAISS padding (-1) and ids past the metadata
+    keep = (sem_idxs >= 0) & (sem_idxs < n_docs)
+    sem_raw, idxs = sem_scores[keep].astype(np.float64), sem_idxs[keep]
+    n = len(idxs)
+    if n == 0:
+        return []
 
-    candidates.sort(key=lambda x: x["score_final"], reverse=True)
+    # one column per field (struct-of-arrays) instead of a dict per candidate
+    titles    = [cols["title"][i] or "" for i in idxs]
+    summaries = [cols["summary"][i] or "" for i in idxs]
+    pub_ats   = [cols["published_at"][i] for i in idxs]
+
+    # tokenize the query once for every candidate
+    q_tokens = tokenize(query)
+
+    tf = get_tf_index()
+    if tf is not None:
+        # hits, single-word synonyms and the gate from sparse gathers; only phrases need the text
+        kw_raw, gate = tf_keyword_scores(tf, q_tokens, idxs)
+        kw_raw += np.fromiter((phrase_bonus(q_tokens, t, s) for t, s in zip(titles, summaries)),
+                              dtype=np.float64, count=n)
+    else:
+        # gate and keyword score from one tokenization of each candidate
+        must_q = not MUST_TERMS.isdisjoint(q_tokens)
+        scored = [score_item(q_tokens, must_q, t, s) for t, s in zip(titles, summaries)]
+        gate   = np.fromiter((g for g, _ in scored), dtype=bool, count=n)
+        kw_raw = np.fromiter((kw for _, kw in scored), dtype=np.float64, count=n)
+    rec    = recency_boost_unix(cols["published_at_unix"][idxs], now.timestamp())
+
+    # map cosine similarity from [-1,1] to [0,1]; keyword normalized by max to [0,1]
+    sem_norm = (sem_raw + 1.0) / 2.0
+    kw_norm  = kw_raw / max(1e-9, float(kw_raw.max()))
+
+    # final score + soft penalty if query expects cargo/station but doc lacks it
+    final = SEM_W * sem_norm + KW_W * kw_norm + REC_W * rec
+    final *= np.where(gate, 1.0, 0.6)
+
+    # partial top-k selection, then sort just the winners (ties keep candidate order)
+    top   = np.argpartition(-final, k)[:k] if k < n else np.arange(n)
+    order = top[np.lexsort((top, -final[top]))]
 
     results = []
-    for c in candidates[:k]:
+    for j in order:
+        i = idxs[j]
         results.append({
-            "title": c["title"],
-            "url": c["url"],
-            "published_at": c["published_at"],
-            "source": c["source"],
-            "score_final":    float(c["score_final"]),
-            "score_semantic": float(c["semantic_norm"]),
-            "score_keyword":  float(c["keyword_norm"]),
-            "score_recency":  float(c["recency"]),
-            "semantic_raw":   float(c["semantic_raw"]),
-            "keyword_raw":    float(c["keyword_raw"]),
+            "idx": int(i),  # row in the index / raw source file
+            "title": titles[j],
+            "url": cols["url"][i],
+            "published_at": pub_ats[j],
+            "source": cols["source"][i],
+            "score_final":    float(final[j]),
+            "score_semantic": float(sem_norm[j]),
+            "score_keyword":  float(kw_norm[j]),
+            "score_recency":  float(rec[j]),
+            "semantic_raw":   float(sem_raw[j]),
+            "keyword_raw":    float(kw_raw[j]),
         })
     return results
 
@@ -1,8 +1,9 @@
 import json, feedparser, hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as dtp
 from pathlib import Path
-from langdetect import detect, LangDetectException
+from ftlangdetect import detect as ft_detect
 
 
 
@@ -17,9 +18,10 @@ def is_english(entry):
     if entry.get("title") or entry.get("summary"):
         text = entry["title"] + " " + entry["summary"]
         try:
-            lang = detect(text)
+            # fastText predicts a single line at a time
+            lang = ft_detect(text.replace("\n", " "), low_memory=True)["lang"]
             return lang == "en"
-        except LangDetectException:
+        except ValueError:
             return False
     return False
 
@@ -28,16 +30,17 @@ def normalize(entry, feed_url):
     iso = entry.get("published") or entry.get("updated") or None # Get the published or updated date
 
     try:
-        published_at = dtp.parse(iso).astimezone(timezone.utc).isoformat() # Convert to UTC
+        published_dt = dtp.parse(iso).astimezone(timezone.utc) # Convert to UTC
     except Exception:
-        published_at = datetime.now(timezone.utc).isoformat() # Fallback to current time in UTC
+        published_dt = datetime.now(timezone.utc) # Fallback to current time in UTC
+    published_at = published_dt.isoformat()
 
 
     title = (entry.get("title") or "").strip()
     summary = (entry.get("summary") or entry.get("description") or "").strip()
     url = entry.get("link")
     source = feed_url
-    doc_id = hashlib.sha1((url or title).encode()).hexdigest()
+    doc_id = hashlib.blake2b((url or title).encode(), digest_size=16).hexdigest()
     
     
     return {
@@ -48,30 +51,35 @@ def normalize(entry, feed_url):
         "published_at": published_at,
         "url": url,
         "source": source,
-        "topics": []
+        "topics": [],
+        "_dt": published_dt  # parsed date for the cutoff filter; dropped before writing
     }
 
 def run_ingest_rss(max_items_per_feed = 100, since_days=30):
     
     output = []
-    
-    for feed in FEEDS:
-        parsed = feedparser.parse(feed)
+    seen_urls = set()
+
+    # Fetch all feeds concurrently; each parse is dominated by network I/O
+    with ThreadPoolExecutor(max_workers=len(FEEDS)) as ex:
+        parsed_feeds = list(ex.map(feedparser.parse, FEEDS))
+
+    for feed, parsed in zip(FEEDS, parsed_feeds):
         entries = parsed.entries[:max_items_per_feed]
         for entry in entries:
+            # skip duplicates (and link-less entries) before language detection
+            url = entry.get("link")
+            if not url or url in seen_urls:
+                continue
             if is_english(entry):
                 item = normalize(entry, feed)
-                if item["title"] and item["url"]:
+                if item["title"]:
+                    seen_urls.add(url)
                     output.append(item)
-        if since_days is not None:
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=since_days)
-            output = [item for item in output if dtp.parse(item["published_at"]) >= cutoff_date]
 
-    de_duplicated = {}
-    for result in output:
-        de_duplicated[result["url"]] = result
-        
-    output = list(de_duplicated.values())
+    if since_days is not None:
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=since_days)
+        output = [item for item in output if item["_dt"] >= cutoff_date]
 
     date_tag = datetime.now(timezone.utc).strftime("%Y%m%d")
     Path("data/raw").mkdir(parents=True, exist_ok=True)
@@ -79,6 +87,7 @@ def run_ingest_rss(max_items_per_feed = 100, since_days=30):
 
     with out_path.open("w", encoding="utf-8") as f:
         for result in output:
+            del result["_dt"]
             f.write(json.dumps(result, ensure_ascii=False) + "\n")
 
     print(f"Finished processing RSS feeds. {len(output)} items written to {out_path}")
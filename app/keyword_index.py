@@ -0,0 +1,101 @@
+from collections import Counter
+from pathlib import Path
+import orjson
+import numpy as np
+from scipy import sparse
+from text_utils import tokenize, synonym_plan, MUST_TERMS
+
+INDEX_DIR = Path("data/index")
+
+
+def _tf_rows(texts, vocab: dict) -> tuple[list, list, list]:
+    """CSR (indptr, indices, data) of token counts per text, growing `vocab` as needed."""
+    indptr, indices, data = [0], [], []
+    for text in texts:
+        counts = Counter(vocab.setdefault(tok, len(vocab)) for tok in tokenize(text))
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    return indptr, indices, data
+
+def build_tf_index(titles, summaries) -> dict:
+    """
+    Build title/summary term-frequency matrices (docs x vocab) over a shared vocabulary.
+    Rows follow the order of `titles`/`summaries`, i.e. the embeddings order.
+    """
+    vocab: dict[str, int] = {}
+    title_rows   = _tf_rows(titles, vocab)
+    summary_rows = _tf_rows(summaries, vocab)
+
+    def to_csr(rows):
+        indptr, indices, data = rows
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.int32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(vocab)),
+        )
+
+    return {"vocab": vocab, "title": to_csr(title_rows), "summary": to_csr(summary_rows)}
+
+def save_tf_index(tf: dict, out_dir: Path = INDEX_DIR):
+    sparse.save_npz(out_dir / "tf_title.npz", tf["title"])
+    sparse.save_npz(out_dir / "tf_summary.npz", tf["summary"])
+    (out_dir / "vocab.json").write_bytes(orjson.dumps(tf["vocab"]))
+
+def load_tf_index(index_dir: Path = INDEX_DIR) -> dict | None:
+    """Load the matrices written by save_tf_index, or None if the index has none."""
+    paths = [index_dir / "tf_title.npz", index_dir / "tf_summary.npz", index_dir / "vocab.json"]
+    if not all(p.exists() for p in paths):
+        return None
+    return {
+        "title":   sparse.load_npz(paths[0]).tocsr(),
+        "summary": sparse.load_npz(paths[1]).tocsr(),
+        "vocab":   orjson.loads(paths[2].read_bytes()),
+    }
+
+def tf_keyword_hits(tf: dict, q_tokens: list[str], doc_idxs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized text_utils.keyword_hits for the given documents.
+    Returns (title_hits, summary_hits) as float arrays aligned with `doc_idxs`.
+    """
+    vocab = tf["vocab"]
+    # repeated query tokens repeat the column, matching keyword_hits' per-token sum
+    q_ids = [vocab[t] for t in q_tokens if t in vocab]
+    if not q_ids:
+        return np.zeros(len(doc_idxs)), np.zeros(len(doc_idxs))
+    title_hits = tf["title"][doc_idxs][:, q_ids].sum(axis=1)
+    sum_hits   = tf["summary"][doc_idxs][:, q_ids].sum(axis=1)
+    return np.asarray(title_hits, dtype=np.float64).ravel(), np.asarray(sum_hits, dtype=np.float64).ravel()
+
+def tf_keyword_scores(tf: dict, q_tokens: list[str], doc_idxs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized text_utils.score_item for the given documents, minus text_utils.phrase_bonus
+    (exact phrase and multi-word synonyms), which the caller adds from the raw text.
+    Returns (keyword_scores, passes_gate) aligned with `doc_idxs`.
+    """
+    vocab   = tf["vocab"]
+    title   = tf["title"][doc_idxs]
+    summary = tf["summary"][doc_idxs]
+    n = len(doc_idxs)
+
+    # base hits, title weighted 3x
+    t_hits, s_hits = tf_keyword_hits(tf, q_tokens, doc_idxs)
+    scores = 3.0 * t_hits + 1.0 * s_hits
+
+    # single-word synonyms: presence matrices over just the query's synonym columns
+    single, _ = synonym_plan(tuple(q_tokens))
+    syn = [(vocab[s], w) for s, w in single if s in vocab]
+    if syn:
+        cols = [i for i, _ in syn]
+        w    = np.array([w for _, w in syn], dtype=np.float64)
+        in_t = title[:, cols].toarray() > 0
+        in_s = summary[:, cols].toarray() > 0
+        scores += in_t @ w + 0.3 * ((in_s & ~in_t) @ w)
+
+    # must-have gate: any must-term in title or summary
+    if MUST_TERMS.isdisjoint(q_tokens):
+        return scores, np.ones(n, dtype=bool)
+    must = [vocab[t] for t in MUST_TERMS if t in vocab]
+    if not must:
+        return scores, np.zeros(n, dtype=bool)
+    present = np.asarray(title[:, must].sum(axis=1) + summary[:, must].sum(axis=1)).ravel()
+    return scores, present > 0
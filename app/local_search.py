@@ -1,25 +1,26 @@
-import json, re
+import orjson
 from pathlib import Path
 from collections import Counter
 from datetime import datetime, timezone
 from math import exp
 from typing import List, Dict
+import numpy as np
 from text_utils import tokenize, contains_word
 
-def latest_jsonl_files(directory = "data/raw") -> List[Path]:
-    """Returns a list of the latest JSONL files in the given directory.
+def latest_jsonl_files(directory = "data/raw") -> Path:
+    """Returns the latest JSONL file in the given directory.
     Args:
         directory (str): The directory to search for JSONL files.
     Returns:
-        List[Path]: A list of the latest JSONL files.
+        Path: The latest (by date-stamped name) JSONL file.
     """
     
-    jsonl_files = sorted(Path(directory).glob("*.jsonl"))
+    latest = max(Path(directory).glob("*.jsonl"), key=lambda p: p.name, default=None)
     
-    if not jsonl_files:
+    if latest is None:
         raise FileNotFoundError("No JSONL files found")
     
-    return jsonl_files[-1]
+    return latest
 
 def load_jsonl(file_path: Path) -> List[Dict]:
     """Load a JSONL file and return a list of dictionaries.
@@ -29,12 +30,8 @@ def load_jsonl(file_path: Path) -> List[Dict]:
         List[Dict]: A list of dictionaries representing the JSON objects in the file.
     """
     
-    items = []
-    with file_path.open(encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                items.append(json.loads(line))
-    return items
+    with file_path.open("rb") as f:
+        return [orjson.loads(line) for line in f if line.strip()]
 
 def as_utc(ts: str) -> datetime:
     """Convert a timestamp string to a UTC datetime.
@@ -96,6 +93,19 @@ def recency_boost(published_at, now: datetime, tau_days: float=14.0) -> float:
     age_days = max(0.0, (now - dt).total_seconds() / 86400.0)  # convert seconds → days
     return exp(-age_days / tau_days)
 
+def recency_boost_unix(published_unix: np.ndarray, now_unix: float, tau_days: float=14.0) -> np.ndarray:
+    """
+    Vectorized recency_boost over precomputed publication timestamps.
+    Args:
+        published_unix (np.ndarray): Publication times as Unix seconds.
+        now_unix (float): The current time as Unix seconds.
+        tau_days (float): The time constant for the decay function, in days.
+    Returns:
+        np.ndarray: The boost for each timestamp.
+    """
+    age_days = np.maximum(0.0, (now_unix - published_unix) / 86400.0)
+    return np.exp(-age_days / tau_days)
+
 def keyword_score(query_tokens: List[str], title: str, summary: str) -> float:
     """
     Calculate the keyword score for a given text based on the query tokens.
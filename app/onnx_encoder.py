@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class OnnxEncoder:
+    """
+    Drop-in for SentenceTransformer.encode() backed by an ONNX Runtime export.
+
+    Export (and optionally quantize to INT8) once with optimum:
+        optimum-cli export onnx --model BAAI/bge-small-en-v1.5 --task feature-extraction onnx-bge/
+        optimum-cli onnxruntime quantize --onnx_model onnx-bge --avx512_vnni -o onnx-bge-int8
+    then point EMBEDDING_ONNX_DIR at the output directory.
+
+    Pooling must match the sentence-transformers config of the model: bge uses the
+    CLS token, most other models use "mean".
+    """
+
+    def __init__(self, model_dir: str, tokenizer_name: str, pooling: str = "cls", max_length: int = 512):
+        # optional dependency, only needed when the ONNX backend is enabled
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        if pooling not in ("cls", "mean"):
+            raise ValueError(f"Unsupported pooling: {pooling!r}")
+        self.model      = ORTModelForFeatureExtraction.from_pretrained(model_dir)
+        self.tokenizer  = AutoTokenizer.from_pretrained(tokenizer_name)
+        self.pooling    = pooling
+        self.max_length = max_length
+
+    def eval(self):
+        """No-op, for parity with torch modules."""
+        return self
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        out = []
+        for i in range(0, len(sentences), batch_size):
+            batch = self.tokenizer(sentences[i:i + batch_size], padding=True, truncation=True,
+                                   max_length=self.max_length, return_tensors="np")
+            hidden = self.model(**batch).last_hidden_state
+            if self.pooling == "cls":
+                emb = hidden[:, 0]
+            else:
+                mask = batch["attention_mask"][..., None].astype(hidden.dtype)
+                emb = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            out.append(emb)
+
+        embs = np.concatenate(out).astype(np.float32) if out else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(embs):
+            embs /= np.maximum(np.linalg.norm(embs, axis=1, keepdims=True), 1e-12)
+        return embs[0] if single else embs
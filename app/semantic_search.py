@@ -1,4 +1,5 @@
-import os, json
+import os
+import orjson
 from pathlib import Path
 import numpy as np
 import faiss
@@ -12,12 +13,8 @@ META_PATH = Path("data/index/meta.jsonl")
 MODEL_NAME = os.getenv("EMBEDDING_MODEL")
 
 def load_meta():
-    rows = []
-    with META_PATH.open(encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                rows.append(json.loads(line))
-    return rows
+    with META_PATH.open("rb") as f:
+        return [orjson.loads(line) for line in f if line.strip()]
 
 def search(query:str, k:int=5):
     meta = load_meta()
@@ -1,26 +1,52 @@
 from collections import Counter
+from functools import lru_cache
 import re
 
-STOPWORDS = {
+STOPWORDS = frozenset({
     "the","a","an","to","of","and","in","on","for","at","from","by","with","as",
     "is","are","was","were","be","been","being","that","this","these","those",
     "it","its","into","over","about","than","up","down","out","off","or","not"
-}
-WORD_RE = re.compile(r"[a-z0-9]+")
+})
+WORD_RE = re.compile(r"[a-z0-9]+")  # reference definition of a token
+# maps every byte outside [a-z0-9] to a space, so split() yields WORD_RE's tokens
+_SEP_TABLE = bytes(c if chr(c) in "abcdefghijklmnopqrstuvwxyz0123456789" else 32 for c in range(256))
+
+@lru_cache(maxsize=4096)
+def _tokenize_cached(s: str) -> tuple[str, ...]:
+    """Memoized tokenize; titles/summaries are re-tokenized by several scorers per search."""
+    # Non-ASCII chars are never part of a token, so encoding them as "?" keeps the
+    # tokens identical to WORD_RE.findall while translate+split runs entirely in C.
+    words = (s or "").lower().encode("ascii", "replace").translate(_SEP_TABLE).decode("ascii").split()
+    return tuple(w for w in words if w not in STOPWORDS)
 
 def tokenize(s: str):
-    return [w for w in WORD_RE.findall((s or "").lower()) if w not in STOPWORDS]
+    return list(_tokenize_cached(s))
+
+@lru_cache(maxsize=4096)
+def _token_counts(s: str) -> Counter:
+    """Memoized term counts of a text; treat the result as read-only."""
+    return Counter(_tokenize_cached(s))
+
+# compiled word-boundary patterns, keyed by lowercased word
+_PAT_CACHE: dict[str, re.Pattern] = {}
 
 def contains_word(text: str, word: str) -> bool:
-    return re.search(rf"\b{re.escape(word.lower())}\b", (text or "").lower()) is not None
-
-def keyword_hits(query: str, title: str, summary: str = "") -> tuple[int, int]:
-    q_tokens = tokenize(query)
-    t_title  = tokenize(title)
-    t_sum    = tokenize(summary)
-    # simple term-frequency counts
-    title_hits = sum(t_title.count(t) for t in q_tokens)
-    sum_hits   = sum(t_sum.count(t)   for t in q_tokens)
+    return contains_word_pre((text or "").lower(), word.lower())
+
+def contains_word_pre(text_low: str, word_low: str) -> bool:
+    """contains_word for text and word that are already lowercased."""
+    pat = _PAT_CACHE.get(word_low)
+    if pat is None:
+        pat = _PAT_CACHE[word_low] = re.compile(rf"\b{re.escape(word_low)}\b")
+    return pat.search(text_low) is not None
+
+def keyword_hits(q_tokens: list[str], title: str, summary: str = "") -> tuple[int, int]:
+    return _keyword_hits_pre(q_tokens, _token_counts(title), _token_counts(summary))
+
+def _keyword_hits_pre(q_tokens, c_title: Counter, c_sum: Counter) -> tuple[int, int]:
+    # simple term-frequency counts (repeated query tokens count again)
+    title_hits = sum(c_title[t] for t in q_tokens)
+    sum_hits   = sum(c_sum[t]   for t in q_tokens)
     return title_hits, sum_hits
 
 # domain synonyms for gentle expansion
@@ -35,39 +61,94 @@ SYNONYMS = {
     "lunar":    ["moon","artemis"],
     "artemis":  ["moon","lunar"],
 }
+# single-word synonyms are checked against the token counts; only phrases need a regex
+_SYN_SINGLE = {tok: tuple(s for s in syns if " " not in s) for tok, syns in SYNONYMS.items()}
+_SYN_MULTI  = {tok: tuple(s for s in syns if " " in s) for tok, syns in SYNONYMS.items()}
+
+@lru_cache(maxsize=1024)
+def synonym_plan(q_tokens: tuple[str, ...]) -> tuple[tuple, tuple]:
+    """
+    Every synonym literal the query can match, deduplicated once per query as
+    (single_words, phrases) of (synonym, weight) pairs; weight counts how many
+    query tokens expand to that synonym.
+    """
+    single: Counter = Counter()
+    multi:  Counter = Counter()
+    for tok in q_tokens:
+        single.update(_SYN_SINGLE.get(tok, ()))
+        multi.update(_SYN_MULTI.get(tok, ()))
+    return tuple(single.items()), tuple(multi.items())
 
-MUST_TERMS = {"cargo","resupply","dragon","crs","station","iss"}
+MUST_TERMS = frozenset({"cargo","resupply","dragon","crs","station","iss"})
 
-def enhanced_keyword_score(query: str, title: str, summary: str = "") -> float:
+def enhanced_keyword_score(q_tokens: list[str], title: str, summary: str = "") -> float:
+    """Keyword score for an already-tokenized query (see tokenize)."""
     # base hits (title weighted 3x)
-    t_hits, s_hits = keyword_hits(query, title, summary)
-    score = 3.0 * t_hits + 1.0 * s_hits
+    c_title = _token_counts(title)
+    c_sum   = _token_counts(summary)
+    t_hits, s_hits = _keyword_hits_pre(q_tokens, c_title, c_sum)
+    t_low = (title or "").lower()
+    s_low = (summary or "").lower()
+    return 3.0 * t_hits + 1.0 * s_hits + _keyword_bonus_pre(q_tokens, t_low, s_low, c_title, c_sum)
+
+def keyword_bonus(q_tokens: list[str], title: str, summary: str = "") -> float:
+    """Exact-phrase and synonym bonuses on top of the base keyword hits."""
+    return _keyword_bonus_pre(q_tokens, (title or "").lower(), (summary or "").lower(),
+                              _token_counts(title), _token_counts(summary))
+
+def _keyword_bonus_pre(q_tokens, t_low: str, s_low: str, c_title: Counter, c_sum: Counter) -> float:
+    score = _phrase_bonus_pre(q_tokens, t_low, s_low)
+
+    # each synonym counts once per query token: 1.0 if in the title, else 0.3 if in the summary
+    single, _ = synonym_plan(tuple(q_tokens))
+    for syn, w in single:
+        if syn in c_title:
+            score += 1.0 * w
+        elif syn in c_sum:
+            score += 0.3 * w
+    return score
+
+def phrase_bonus(q_tokens: list[str], title: str, summary: str = "") -> float:
+    """The part of keyword_bonus that needs the raw text: exact query phrase and multi-word synonyms."""
+    return _phrase_bonus_pre(q_tokens, (title or "").lower(), (summary or "").lower())
+
+def _phrase_bonus_pre(q_tokens, t_low: str, s_low: str) -> float:
+    score = 0.0
 
     # exact-phrase bonus (e.g., "cargo to the station" appearing in title/summary)
-    q_clean = " ".join(tokenize(query))
-    if q_clean and q_clean in (title or "").lower():
+    q_clean = " ".join(q_tokens)
+    if q_clean and q_clean in t_low:
         score += 2.0
-    if q_clean and q_clean in (summary or "").lower():
+    if q_clean and q_clean in s_low:
         score += 0.7
 
-    # synonym bonuses
-    q_tokens = tokenize(query)
-    t_low = (title or "").lower()
-    s_low = (summary or "").lower()
-    for tok in q_tokens:
-        for syn in SYNONYMS.get(tok, []):
-            if contains_word(t_low, syn):
-                score += 1.0
-            elif contains_word(s_low, syn):
-                score += 0.3
+    _, multi = synonym_plan(tuple(q_tokens))
+    for syn, w in multi:
+        if contains_word_pre(t_low, syn):
+            score += 1.0 * w
+        elif contains_word_pre(s_low, syn):
+            score += 0.3 * w
     return score
 
-def must_have_gate(query: str, title: str, summary: str) -> bool:
+def _has_must_term(c_title: Counter, c_sum: Counter) -> bool:
+    return any(t in c_title or t in c_sum for t in MUST_TERMS)
+
+def must_have_gate(q_tokens: list[str], title: str, summary: str) -> bool:
     """If query mentions any cargo/station terms, require at least one must-term in title or summary."""
-    q_tokens = set(tokenize(query))
-    if MUST_TERMS.intersection(q_tokens):
-        for t in MUST_TERMS:
-            if contains_word(title, t) or contains_word(summary, t):
-                return True
-        return False
-    return True
\ No newline at end of file
+    if not MUST_TERMS.isdisjoint(q_tokens):
+        return _has_must_term(_token_counts(title), _token_counts(summary))
+    return True
+
+def score_item(q_tokens: list[str], must_terms_in_query: bool, title: str, summary: str) -> tuple[bool, float]:
+    """
+    must_have_gate and enhanced_keyword_score in one pass over title/summary.
+    `must_terms_in_query` is `not MUST_TERMS.isdisjoint(q_tokens)`, computed once per query.
+    Returns (passes_gate, keyword_score).
+    """
+    c_title = _token_counts(title)
+    c_sum   = _token_counts(summary)
+    passes  = not must_terms_in_query or _has_must_term(c_title, c_sum)
+
+    t_hits, s_hits = _keyword_hits_pre(q_tokens, c_title, c_sum)
+    bonus = _keyword_bonus_pre(q_tokens, (title or "").lower(), (summary or "").lower(), c_title, c_sum)
+    return passes, 3.0 * t_hits + 1.0 * s_hits + bonus
\ No newline at end of file
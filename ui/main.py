@@ -1,8 +1,10 @@
 import os
+import hashlib
 from pathlib import Path
 import streamlit as st
+import torch
 from app.hybrid_search import hybrid_search, load_raw_items
-from transformers import pipeline
+from transformers import pipeline, AutoTokenizer
 import textwrap
 import sys
 
@@ -12,32 +14,78 @@ if str(ROOT) not in sys.path:
 
 st.set_page_config(page_title="AstroNews Explorer", page_icon="🛰️", layout="wide")
 
+SUMMARY_MODEL = "sshleifer/distilbart-cnn-12-6"
+QA_MODEL = "deepset/roberta-base-squad2"
+# "onnx" runs both pipelines on ONNX Runtime (needs optimum[onnxruntime]); default is PyTorch
+PIPELINE_BACKEND = os.getenv("PIPELINE_BACKEND", "torch")
+
+@st.cache_resource(show_spinner=False)
+def configure_torch():
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # inter-op pool already started (e.g. by a search); keep its size
+
+def quantize(pipe):
+    # dynamic INT8 on the Linear layers: about half the memory, faster CPU matmuls
+    pipe.model = torch.quantization.quantize_dynamic(pipe.model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+    return pipe
+
+# Each pipeline loads on first use, so summarize-only sessions never load the QA weights
+@st.cache_resource(show_spinner=False)
+def get_summarizer():
+    configure_torch()
+    if PIPELINE_BACKEND == "onnx":
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        # export=True converts the PyTorch checkpoint to ONNX on first load
+        return pipeline(
+            "summarization",
+            model=ORTModelForSeq2SeqLM.from_pretrained(SUMMARY_MODEL, export=True, provider="CPUExecutionProvider"),
+            tokenizer=AutoTokenizer.from_pretrained(SUMMARY_MODEL),
+        )
+    return quantize(pipeline("summarization", model=SUMMARY_MODEL))
+
 @st.cache_resource(show_spinner=False)
-def get_pipelines():
-    summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
-    qa = pipeline("question-answering", model="deepset/roberta-base-squad2")
-    return summarizer, qa
+def get_qa():
+    configure_torch()
+    if PIPELINE_BACKEND == "onnx":
+        from optimum.onnxruntime import ORTModelForQuestionAnswering
+        return pipeline(
+            "question-answering",
+            model=ORTModelForQuestionAnswering.from_pretrained(QA_MODEL, export=True, provider="CPUExecutionProvider"),
+            tokenizer=AutoTokenizer.from_pretrained(QA_MODEL),
+        )
+    return quantize(pipeline("question-answering", model=QA_MODEL))
 
 @st.cache_resource(show_spinner=False)
 def get_raw_items():
-    return load_raw_items()
+    # items plus a URL -> index lookup, both built once per process
+    items = load_raw_items()
+    return items, {it.get("url"): i for i, it in enumerate(items) if it.get("url")}
 
 def make_context(indices, raw_items, max_chars=1800):
     # concatenate titles + summaries of the selected indices
     chunks = []
+    total = 0
     for idx in indices:
         if idx < len(raw_items):
             it = raw_items[idx]
-            title = it.get("title", "")
-            summary = it.get("summary", "")
-            url = it.get("url", "")
-            text = f"{title}\n\n{summary}\n\nSource: {url}\n---\n"
+            text = "{}\n\n{}\n\nSource: {}\n---\n".format(it.get("title", ""), it.get("summary", ""), it.get("url", ""))
             chunks.append(text)
+            total += len(text)
+            if total > max_chars:
+                break  # the rest would be truncated away anyway
     ctx = "".join(chunks)
     if len(ctx) > max_chars:
         ctx = ctx[:max_chars] + "…"
     return ctx
 
+def output_key(tool, ctx, *params):
+    # session_state key for a tool's output on this exact context and settings
+    digest = hashlib.blake2b(ctx.encode(), digest_size=16).hexdigest()
+    return ":".join(["out", tool, digest, *map(str, params)])
+
 st.title("🛰️ AstroNews Explorer")
 
 # Sidebar controls
@@ -66,6 +114,9 @@ length_mapping = {
     "Long": {"max": 200, "min": 60}
 }
 
+# summarizer input window, in tokens (distilbart accepts up to 1024)
+SUMMARY_WINDOW_TOKENS = 768
+
 eli5_mapping = {
     "Brief": {"max": 100, "min": 40},
     "Normal": {"max": 150, "min": 60},
@@ -77,8 +128,7 @@ if st.sidebar.button("Search", type="primary"):
     st.session_state["hits"] = hybrid_search(query, k=k)
 
 hits = st.session_state.get("hits", [])
-raw_items = get_raw_items()
-summarizer, qa = get_pipelines()
+raw_items, url_to_idx = get_raw_items()
 
 col_left, col_right = st.columns([2, 1], gap="large")
 
@@ -99,13 +149,10 @@ with col_left:
                 st.write(url)
                 st.caption(f"score: {final:.3f} | sem {sem:.2f} · kw {kw:.2f} · rec {rec:.2f}")
                 if checked:
-                    # We need the index that produced this hit; hybrid_search doesn't return it.
-                    # Quick heuristic: match by URL back to raw_items index.
-                    # (For a perfect mapping, include idx in your hybrid_search results next time.)
-                    for idx, it in enumerate(raw_items):
-                        if it.get("url") == url:
-                            selected_idxs.append(idx)
-                            break
+                    # hits carry their raw_items index; the URL lookup covers hits from older sessions
+                    idx = h["idx"] if "idx" in h else url_to_idx.get(url)
+                    if idx is not None:
+                        selected_idxs.append(idx)
 
         st.markdown("---")
         st.subheader("AI Tools")
@@ -120,16 +167,25 @@ with col_left:
         with col1:
             if st.button("Generate bullets"):
                 if ctx.strip():
-                    # Use dynamic length settings
-                    max_len = length_mapping[summary_length]["max"]
-                    min_len = length_mapping[summary_length]["min"]
-                    
-                    # short abstractive summary; split if too long
-                    parts = [ctx[i:i+900] for i in range(0, len(ctx), 900)]
-                    bullets = []
-                    for p in parts[:3]:  # keep it fast
-                        out = summarizer(p, max_length=max_len, min_length=min_len, do_sample=False)[0]["summary_text"]
-                        bullets.append(out.strip())
+                    key = output_key("sum", ctx, summary_length)
+                    bullets = st.session_state.get(key)
+                    if bullets is None:
+                        # Use dynamic length settings
+                        max_len = length_mapping[summary_length]["max"]
+                        min_len = length_mapping[summary_length]["min"]
+
+                        # short abstractive summary; split on token windows so no word is cut mid-token
+                        summarizer = get_summarizer()
+                        tok = summarizer.tokenizer
+                        ids = tok.encode(ctx, add_special_tokens=False)
+                        windows = [ids[i:i+SUMMARY_WINDOW_TOKENS] for i in range(0, len(ids), SUMMARY_WINDOW_TOKENS)][:3]  # keep it fast
+                        parts = tok.batch_decode(windows, skip_special_tokens=True)
+                        # one batched pipeline call instead of one call per part
+                        with torch.inference_mode():
+                            outs = summarizer(parts, max_length=max_len, min_length=min_len, do_sample=False,
+                                              truncation=True, batch_size=len(parts))
+                        bullets = [o["summary_text"].strip() for o in outs]
+                        st.session_state[key] = bullets
                     st.success("• " + "\n• ".join(bullets))
                 else:
                     st.warning("Select at least one article.")
@@ -142,11 +198,16 @@ with col_left:
         with col1:
             if st.button("ELI5"):
                 if ctx.strip():
-                    max_len = eli5_mapping[eli5_length]["max"]
-                    min_len = eli5_mapping[eli5_length]["min"]
-                    
-                    prompt = "Explain this to a 12-year-old:\n\n" + ctx
-                    out = summarizer(prompt, max_length=max_len, min_length=min_len, do_sample=False)[0]["summary_text"]
+                    key = output_key("eli5", ctx, eli5_length)
+                    out = st.session_state.get(key)
+                    if out is None:
+                        max_len = eli5_mapping[eli5_length]["max"]
+                        min_len = eli5_mapping[eli5_length]["min"]
+
+                        prompt = "Explain this to a 12-year-old:\n\n" + ctx
+                        with torch.inference_mode():
+                            out = get_summarizer()(prompt, max_length=max_len, min_length=min_len, do_sample=False)[0]["summary_text"]
+                        st.session_state[key] = out
                     st.info(out.strip())
                 else:
                     st.warning("Select at least one article.")
@@ -158,7 +219,12 @@ with col_left:
         q_user = st.text_input("Your question", value="ex: What cargo did Dragon deliver and to where?")
         if st.button("Answer"):
             if ctx.strip():
-                ans = qa(question=q_user, context=ctx)
+                key = output_key("qa", ctx, q_user)
+                ans = st.session_state.get(key)
+                if ans is None:
+                    with torch.inference_mode():
+                        ans = get_qa()(question=q_user, context=ctx)
+                    st.session_state[key] = ans
                 st.write(f"**Answer:** {ans.get('answer')}  \n(confidence: {ans.get('score'):.2f})")
             else:
                 st.warning("Select at least one article.")